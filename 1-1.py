@@ -35,6 +35,14 @@ puzzle input), then add together all the fuel values.
 What is the sum of the fuel requirements for all of the modules on your
 spacecraft?
 """
+import multiprocessing
+import os
+import sys
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to the one-module-at-a-time calculation.
+    np = None
 
 
 def fuel_for_module(module_mass):
@@ -47,7 +55,154 @@ def fuel_for_module(module_mass):
     return (module_mass // 3) - 2
 
 
+def load_masses(path):
+    """
+    Read a whole manifest of module masses, one per line, into an int64
+    NumPy array. Rather than converting each line to a Python int, the
+    digits are parsed in bulk: every run of digit bytes is a number, and its
+    value is the sum of each digit times the power of ten given by its
+    distance from the end of the run.
+    :param path: The path to the manifest.
+    :return: An int64 array of module masses.
+    """
+    with open(path, 'rb') as f:
+        data = np.frombuffer(f.read(), dtype=np.uint8)
+
+    is_digit = (data >= ord('0')) & (data <= ord('9'))
+    digits = (data[is_digit] - ord('0')).astype(np.int64)
+    if len(digits) == 0:
+        return digits
+
+    # Mark the first and last digit of each number, in the digits-only array.
+    padded = np.concatenate(([False], is_digit, [False]))
+    starts = padded[1:-1] & ~padded[:-2]
+    ends = padded[1:-1] & ~padded[2:]
+    run_starts = np.flatnonzero(starts[is_digit])
+    run_ends = np.flatnonzero(ends[is_digit])
+
+    # Each digit's power of ten is its distance from the end of its number.
+    run_ids = np.cumsum(starts[is_digit]) - 1
+    exponents = run_ends[run_ids] - np.arange(len(digits))
+    digits *= 10 ** exponents
+    return np.add.reduceat(digits, run_starts)
+
+
+def total_fuel(masses):
+    """
+    Vectorized fuel_for_module() over a whole array of masses.
+    fuel_for_module() remains the reference implementation.
+    :param masses: An int64 array of module masses.
+    :return: The total fuel needed for all of the modules.
+    """
+    return int(((masses // 3) - 2).sum())
+
+
+def split_manifest(path, num_ranges, min_range_size=1 << 20):
+    """
+    Split a manifest file into byte ranges that each hold whole lines, so
+    they can be summed independently.
+    :param path: The path to the manifest.
+    :param num_ranges: The number of ranges wanted. Small files yield
+        fewer, so that a directory of many small shards doesn't turn into
+        a flood of tiny tasks.
+    :param min_range_size: The smallest range, in bytes, worth splitting
+        off.
+    :return: A list of (path, start, end) byte ranges. Empty for an empty
+        file.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    num_ranges = max(1, min(num_ranges, size // min_range_size))
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for range_num in range(1, num_ranges):
+            # Move the nominal boundary forward to just past the next
+            # newline. Backing up one byte keeps a line that starts exactly
+            # on the nominal boundary in the next range.
+            f.seek(max(0, range_num * size // num_ranges - 1))
+            f.readline()
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return [(path, start, end)
+            for start, end in zip(boundaries[:-1], boundaries[1:])
+            if start < end]
+
+
+def sum_fuel_in_range(byte_range, chunk_size=1 << 20):
+    """
+    Sum the fuel for the modules in one byte range of a manifest. Runs in
+    a worker process.
+    :param byte_range: A (path, start, end) tuple from split_manifest().
+    :param chunk_size: The number of bytes to read at a time.
+    :return: The total fuel for the modules in the range.
+    """
+    path, start, end = byte_range
+    fuel_required = 0
+    carry = b''
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            masses = (carry + chunk).split()
+            # A mass may continue in the next chunk.
+            if masses and not chunk[-1:].isspace():
+                carry = masses.pop()
+            else:
+                carry = b''
+            for mass in masses:
+                fuel_required += fuel_for_module(int(mass))
+    if carry:
+        fuel_required += fuel_for_module(int(carry))
+    return fuel_required
+
+
+def parallel_fuel_total(path, processes=None):
+    """
+    Sum the fuel for a large manifest, or a directory of manifest shards,
+    across a pool of processes.
+    :param path: A manifest file, or a directory whose files are all
+        manifest shards.
+    :param processes: The number of worker processes. Defaults to the
+        number of CPUs.
+    :return: The total fuel needed for all of the modules.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        paths = [shard for shard in paths
+                 if os.path.isfile(shard) and os.path.getsize(shard)]
+    else:
+        paths = [path]
+
+    byte_ranges = []
+    for shard in paths:
+        byte_ranges.extend(split_manifest(shard, processes))
+
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.imap_unordered(sum_fuel_in_range, byte_ranges))
+
+
 def main():
+    # A manifest or directory of shards named on the command line is
+    # summed across all cores.
+    if len(sys.argv) > 1:
+        fuel_required = parallel_fuel_total(sys.argv[1])
+        print("{} units of fuel required".format(fuel_required))
+        return
+
+    if np is not None:
+        fuel_required = total_fuel(load_masses('1-1 sample input.txt'))
+        print("{} units of fuel required".format(fuel_required))
+        return
+
     fuel_required = 0
     with open('1-1 sample input.txt') as f:
         for mass in f.readlines():
@@ -32,6 +32,12 @@ spacecraft when also taking into account the mass of the added fuel?
 (Calculate the fuel requirements for each module separately, then add them
 all up at the end.)
 """
+import sys
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to the one-module-at-a-time calculation.
+    np = None
 
 
 def fuel_for_module(module_mass):
@@ -56,12 +62,171 @@ def fuel_for_module(module_mass):
         total_fuel_needed += additional_mass
 
 
+class FuelTable(object):
+    """
+    The fuel for a module depends only on its mass, and each mass's chain of
+    fuel masses runs through smaller and smaller masses that many modules
+    share. Precompute the answer for every mass below a bound, and remember
+    the answers for larger masses as we compute them.
+    """
+    def __init__(self, bound=100000):
+        """
+        Build the lookup table. Because the first fuel mass is always
+        smaller than the mass itself, each entry only depends on entries
+        already filled in.
+        :param bound: Masses below this are answered from the table.
+        """
+        self.bound = bound
+        self.table = [0] * bound
+        for mass in range(bound):
+            additional_mass = (mass // 3) - 2
+            if additional_mass > 0:
+                self.table[mass] = additional_mass + \
+                    self.table[additional_mass]
+        self.memo = {}
+
+    def fuel_for_module(self, module_mass):
+        """
+        Same result as the module level fuel_for_module().
+        :param module_mass: The mass of the module without fuel.
+        :return: The needed amount of fuel for the module, accounting for the
+            additional mass of the fuel.
+        """
+        if module_mass < self.bound:
+            return self.table[module_mass] if module_mass > 0 else 0
+
+        # Walk down the chain until we reach a mass we know about, then fill
+        # in the masses we passed on the way back up.
+        chain = []
+        mass = module_mass
+        while mass >= self.bound and mass not in self.memo:
+            chain.append(mass)
+            mass = (mass // 3) - 2
+        if mass >= self.bound:
+            fuel = self.memo[mass]
+        else:
+            fuel = self.table[mass] if mass > 0 else 0
+        for mass in reversed(chain):
+            additional_mass = (mass // 3) - 2
+            if additional_mass > 0:
+                fuel += additional_mass
+            self.memo[mass] = fuel
+        return fuel
+
+
+def load_masses(path):
+    """
+    Read a whole manifest of module masses, one per line, into an int64
+    NumPy array. Rather than converting each line to a Python int, the
+    digits are parsed in bulk: every run of digit bytes is a number, and its
+    value is the sum of each digit times the power of ten given by its
+    distance from the end of the run.
+    :param path: The path to the manifest.
+    :return: An int64 array of module masses.
+    """
+    with open(path, 'rb') as f:
+        data = np.frombuffer(f.read(), dtype=np.uint8)
+
+    is_digit = (data >= ord('0')) & (data <= ord('9'))
+    digits = (data[is_digit] - ord('0')).astype(np.int64)
+    if len(digits) == 0:
+        return digits
+
+    # Mark the first and last digit of each number, in the digits-only array.
+    padded = np.concatenate(([False], is_digit, [False]))
+    starts = padded[1:-1] & ~padded[:-2]
+    ends = padded[1:-1] & ~padded[2:]
+    run_starts = np.flatnonzero(starts[is_digit])
+    run_ends = np.flatnonzero(ends[is_digit])
+
+    # Each digit's power of ten is its distance from the end of its number.
+    run_ids = np.cumsum(starts[is_digit]) - 1
+    exponents = run_ends[run_ids] - np.arange(len(digits))
+    digits *= 10 ** exponents
+    return np.add.reduceat(digits, run_starts)
+
+
+def total_fuel(masses):
+    """
+    Batched fuel_for_module() over a whole array of masses. Rather than
+    looping per module, every module's additional mass is updated at once,
+    and modules whose additional mass has gone non-positive are dropped
+    before the next round. Masses shrink by a factor of three per round, so
+    there are only about log3(max mass) rounds.
+    fuel_for_module() remains the reference implementation.
+    :param masses: An int64 array of module masses without fuel.
+    :return: The total fuel needed for all of the modules, accounting for
+        the additional mass of the fuel.
+    """
+    total_fuel_needed = 0
+    additional_mass = masses
+    while len(additional_mass):
+        additional_mass = (additional_mass // 3) - 2
+        additional_mass = additional_mass[additional_mass > 0]
+        total_fuel_needed += int(additional_mass.sum())
+    return total_fuel_needed
+
+
+def stream_fuel_totals(stream, chunk_size=1 << 16):
+    """
+    Compute the part one and part two fuel totals in a single pass over a
+    manifest, reading it a fixed-size chunk at a time so memory use doesn't
+    depend on the size of the manifest. A mass may be split across two
+    chunks; its leading digits are carried over to the next chunk.
+    :param stream: A binary file-like object, e.g. an open file or
+        sys.stdin.buffer.
+    :param chunk_size: The number of bytes to read at a time.
+    :return: (part one total, part two total)
+    """
+    part_one_total = 0
+    part_two_total = 0
+    carry = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        masses = (carry + chunk).split()
+        # If the chunk doesn't end in whitespace, its last mass may continue
+        # in the next chunk.
+        if masses and not chunk[-1:].isspace():
+            carry = masses.pop()
+        else:
+            carry = b''
+        for mass in masses:
+            mass = int(mass)
+            part_one_total += (mass // 3) - 2
+            part_two_total += fuel_for_module(mass)
+    if carry:
+        mass = int(carry)
+        part_one_total += (mass // 3) - 2
+        part_two_total += fuel_for_module(mass)
+    return part_one_total, part_two_total
+
+
 def main():
+    # A manifest named on the command line ('-' for stdin) is streamed, and
+    # both parts' totals are reported.
+    if len(sys.argv) > 1:
+        if sys.argv[1] == '-':
+            totals = stream_fuel_totals(sys.stdin.buffer)
+        else:
+            with open(sys.argv[1], 'rb') as f:
+                totals = stream_fuel_totals(f)
+        print("{} units of fuel required for the modules, {} including "
+              "fuel for the fuel".format(*totals))
+        return
+
+    if np is not None:
+        fuel_required = total_fuel(load_masses('1-1 sample input.txt'))
+        print("{} units of fuel required".format(fuel_required))
+        return
+
+    fuel_table = FuelTable()
     fuel_required = 0
     with open('1-1 sample input.txt') as f:
         for mass in f.readlines():
             mass = int(mass.strip())
-            fuel_required += fuel_for_module(mass)
+            fuel_required += fuel_table.fuel_for_module(mass)
     print("{} units of fuel required".format(fuel_required))
 
 
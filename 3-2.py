@@ -58,6 +58,24 @@ Here are a few more examples:
 What is the Manhattan distance from the central port to the closest
 intersection?
 """
+import bisect
+import itertools
+import multiprocessing
+import sys
+try:
+    import numpy as np
+except ImportError:
+    # Wire (the columnar representation) is unavailable, but the
+    # PathSegment code doesn't need NumPy.
+    np = None
+
+# Sweep line event kinds, in the order they must be handled when they
+# happen at the same X coordinate. Segment end points count as crossings,
+# so horizontal segments must be active before, and still active during,
+# the vertical segment queries at their ends.
+EVENT_INSERT = 0
+EVENT_QUERY = 1
+EVENT_REMOVE = 2
 
 
 class Point(object):
@@ -280,47 +298,587 @@ class PathSegment(object):
             self.path_distance)
 
 
+class Wire(object):
+    """
+    Columnar storage for a whole wire path. Instead of a PathSegment object
+    (holding two Point objects) per segment, the wire is a set of parallel
+    int64 arrays, indexed by segment number:
+        x0, y0:        the segment's previous location
+        x1, y1:        the segment's location
+        path_distance: the distance along the wire to the segment's location
+        vertical:      True if the segment is vertical (x0 == x1), matching
+                       PathSegment.is_vertical()
+    This takes a few dozen bytes per segment, and lets segments be compared
+    in bulk with NumPy.
+    """
+    def __init__(self, path_line):
+        """
+        Parse a path of the form R8,U5,L5,D3 without a Python loop over
+        its moves.
+        :param path_line: The path, as a str or bytes.
+        """
+        if isinstance(path_line, str):
+            path_line = path_line.encode()
+        data = np.frombuffer(path_line, dtype=np.uint8)
+
+        directions = data[np.isin(data, np.frombuffer(b'UDLR', np.uint8))]
+
+        # Each run of digits is a distance. Its value is the sum of each
+        # digit times the power of ten given by its distance from the end
+        # of the run.
+        is_digit = (data >= ord('0')) & (data <= ord('9'))
+        digits = (data[is_digit] - ord('0')).astype(np.int64)
+        padded = np.concatenate(([False], is_digit, [False]))
+        starts = (padded[1:-1] & ~padded[:-2])[is_digit]
+        ends = (padded[1:-1] & ~padded[2:])[is_digit]
+        run_starts = np.flatnonzero(starts)
+        run_ends = np.flatnonzero(ends)
+        run_ids = np.cumsum(starts) - 1
+        digits *= 10 ** (run_ends[run_ids] - np.arange(len(digits)))
+        if len(digits):
+            distances = np.add.reduceat(digits, run_starts)
+        else:
+            distances = digits
+
+        if len(distances) != len(directions):
+            raise ValueError("The path has {} directions but {} "
+                             "distances".format(len(directions),
+                                                len(distances)))
+
+        dx = np.where(directions == ord('R'), distances,
+                      np.where(directions == ord('L'), -distances, 0))
+        dy = np.where(directions == ord('U'), distances,
+                      np.where(directions == ord('D'), -distances, 0))
+        self.x1 = np.cumsum(dx)
+        self.y1 = np.cumsum(dy)
+        self.x0 = self.x1 - dx
+        self.y0 = self.y1 - dy
+        self.path_distance = np.cumsum(distances)
+        self.vertical = self.x0 == self.x1
+
+    def __len__(self):
+        return len(self.x1)
+
+    def __repr__(self):
+        return "[Wire of {} segments]".format(len(self))
+
+
+def perpendicular_crossings(horizontal_wire, vertical_wire,
+                            max_pairs=1 << 22):
+    """
+    Find every crossing of a horizontal segment of one Wire with a vertical
+    segment of another, in bulk. All the pairs are compared at once by
+    broadcasting the horizontal segments (as a column) against the vertical
+    ones (as a row). To bound memory, the horizontal segments are taken a
+    chunk at a time, so that no more than max_pairs pairs are compared at
+    once.
+    :param horizontal_wire: The Wire whose horizontal segments are used.
+    :param vertical_wire: The Wire whose vertical segments are used.
+    :param max_pairs: The most pairs of segments to compare at once.
+    :return: (horizontal wire indices, vertical wire indices, x, y,
+              Manhattan distances, combined path distances), all arrays
+              with one entry per crossing.
+    """
+    h_idx = np.flatnonzero(~horizontal_wire.vertical)
+    v_idx = np.flatnonzero(vertical_wire.vertical)
+
+    h_y = horizontal_wire.y1[h_idx]
+    h_lesser = np.minimum(horizontal_wire.x0, horizontal_wire.x1)[h_idx]
+    h_greater = np.maximum(horizontal_wire.x0, horizontal_wire.x1)[h_idx]
+    v_x = vertical_wire.x1[v_idx]
+    v_lesser = np.minimum(vertical_wire.y0, vertical_wire.y1)[v_idx]
+    v_greater = np.maximum(vertical_wire.y0, vertical_wire.y1)[v_idx]
+
+    found_h = []
+    found_v = []
+    chunk_size = max(1, max_pairs // max(1, len(v_idx)))
+    for start in range(0, len(h_idx), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        crossing_mask = \
+            (v_x >= h_lesser[chunk, None]) & \
+            (v_x <= h_greater[chunk, None]) & \
+            (h_y[chunk, None] >= v_lesser) & \
+            (h_y[chunk, None] <= v_greater)
+        rows, columns = np.nonzero(crossing_mask)
+        found_h.append(rows + start)
+        found_v.append(columns)
+
+    if found_h:
+        found_h = np.concatenate(found_h)
+        found_v = np.concatenate(found_v)
+    else:
+        found_h = found_v = np.zeros(0, dtype=np.int64)
+
+    h_idx = h_idx[found_h]
+    v_idx = v_idx[found_v]
+    x = vertical_wire.x1[v_idx]
+    y = horizontal_wire.y1[h_idx]
+    manhattan = np.abs(x) + np.abs(y)
+    # Back each wire's distance up from the end of its segment to the
+    # crossing, as PathSegment.retract_to() does.
+    path_distance = \
+        horizontal_wire.path_distance[h_idx] - \
+        np.abs(horizontal_wire.x1[h_idx] - x) + \
+        vertical_wire.path_distance[v_idx] - \
+        np.abs(vertical_wire.y1[v_idx] - y)
+    return h_idx, v_idx, x, y, manhattan, path_distance
+
+
+def wire_crossings(first_wire, second_wire, max_pairs=1 << 22):
+    """
+    Find every crossing of two Wires with perpendicular_crossings(), in
+    both orientations, leaving out the start at the origin.
+    :param first_wire: A Wire.
+    :param second_wire: A Wire.
+    :param max_pairs: The most pairs of segments to compare at once.
+    :return: (first wire indices, second wire indices, x, y,
+              Manhattan distances, combined path distances), all arrays
+              with one entry per crossing.
+    """
+    first_h = perpendicular_crossings(first_wire, second_wire, max_pairs)
+    second_h = perpendicular_crossings(second_wire, first_wire, max_pairs)
+    # Put the second set in first wire, second wire order.
+    second_h = (second_h[1], second_h[0]) + second_h[2:]
+    crossings = [np.concatenate(pair) for pair in zip(first_h, second_h)]
+
+    # Don't count the first segments meeting at the origin.
+    keep = (crossings[0] + crossings[1]) != 0
+    return tuple(values[keep] for values in crossings)
+
+
+def overlap_points(segment_1, segment_2, exclude_origin=False):
+    """
+    intersects() only finds perpendicular crossings. Two parallel segments
+    that run along the same line and overlap cross at every point of the
+    overlap. Rather than report them all, report the point of the overlap
+    closest to the origin, and the point with the shortest combined path
+    distance. The path distance changes linearly along the overlap, so that
+    point is at one end of it.
+    :param segment_1: A PathSegment.
+    :param segment_2: A PathSegment.
+    :param exclude_origin: If True, the origin itself isn't a crossing (as
+        for the first segments of two paths, which both start there).
+    :return: A list of up to two Points. Empty if the segments don't
+        overlap.
+    """
+    vertical = segment_1.is_vertical()
+    if vertical != segment_2.is_vertical():
+        return []
+    if vertical:
+        fixed = segment_1.location.x
+        other_fixed = segment_2.location.x
+        ends_1 = (segment_1.location.y, segment_1.prev_location.y)
+        ends_2 = (segment_2.location.y, segment_2.prev_location.y)
+    else:
+        fixed = segment_1.location.y
+        other_fixed = segment_2.location.y
+        ends_1 = (segment_1.location.x, segment_1.prev_location.x)
+        ends_2 = (segment_2.location.x, segment_2.prev_location.x)
+    if fixed != other_fixed:
+        return []
+    lesser = max(min(ends_1), min(ends_2))
+    greater = min(max(ends_1), max(ends_2))
+    if lesser > greater:
+        return []
+
+    def clamp(value):
+        return min(max(value, lesser), greater)
+
+    # The ends of the overlap, and the point of it closest to the origin.
+    candidates = {lesser, greater, clamp(0)}
+    if exclude_origin and fixed == 0:
+        # The next best points are then one step either side of it.
+        candidates.update((clamp(-1), clamp(1)))
+        candidates.discard(0)
+    if not candidates:
+        return []
+    if vertical:
+        points = [Point(fixed, value) for value in candidates]
+    else:
+        points = [Point(value, fixed) for value in candidates]
+
+    def path_distance(point):
+        return segment_1.path_distance - segment_1.retract_to(point) + \
+            segment_2.path_distance - segment_2.retract_to(point)
+
+    closest = min(points, key=lambda point: abs(point.x) + abs(point.y))
+    shortest = min(points, key=path_distance)
+    if shortest is closest:
+        return [closest]
+    return [closest, shortest]
+
+
+def collinear_pairs(first_path, second_path):
+    """
+    Find the pairs of parallel segments, one from each path, that lie on
+    the same line and overlap. Segments are grouped by line, and each
+    group is swept from lesser to greater coordinate. When a segment
+    starts, the other path's segments that are still active (have not
+    ended before it starts) are the ones it overlaps.
+    :param first_path: A list of PathSegments.
+    :param second_path: A list of PathSegments.
+    :return: A generator of (first_path index, second_path index) pairs.
+    """
+    lines = {}
+    for wire, path in enumerate((first_path, second_path)):
+        for idx, segment in enumerate(path):
+            if segment.is_vertical():
+                line = (True, segment.location.x)
+                ends = (segment.location.y, segment.prev_location.y)
+            else:
+                line = (False, segment.location.y)
+                ends = (segment.location.x, segment.prev_location.x)
+            try:
+                lines[line].append((min(ends), max(ends), wire, idx))
+            except KeyError:
+                lines[line] = [(min(ends), max(ends), wire, idx)]
+
+    for segments in lines.values():
+        if len(segments) < 2:
+            continue
+        segments.sort()
+        # Active (greater, index) pairs for each path.
+        active = [[], []]
+        for lesser, greater, wire, idx in segments:
+            # Drop the other path's segments that ended before this one
+            # starts. All the rest overlap it.
+            other_active = [(other_greater, other_idx)
+                            for other_greater, other_idx in active[1 - wire]
+                            if other_greater >= lesser]
+            active[1 - wire] = other_active
+            for other_greater, other_idx in other_active:
+                if wire == 0:
+                    yield idx, other_idx
+                else:
+                    yield other_idx, idx
+            active[wire].append((greater, idx))
+
+
+class ActiveSegments(object):
+    """
+    The set of horizontal segments the sweep line is currently crossing,
+    for one path. The possible Y values are known up front, so they are
+    numbered in sorted order, and a Fenwick (binary indexed) tree counts the
+    active segments at or below each one. Adding or removing a segment,
+    and finding the next occupied Y value at or above a given one, are
+    then all O(log N).
+    """
+    def __init__(self, y_values):
+        """
+        :param y_values: A sorted list of every Y value a segment may have.
+        """
+        self.y_values = y_values
+        self.counts = [0] * (len(y_values) + 1)
+        # The active segment indexes at each Y value, by Y value number.
+        self.segments = [{} for _ in y_values]
+        # The largest power of two no greater than the number of Y values,
+        # where the Fenwick tree search starts.
+        self.top_bit = 1
+        while self.top_bit * 2 <= len(y_values):
+            self.top_bit *= 2
+
+    def update(self, rank, change):
+        rank += 1
+        while rank <= len(self.y_values):
+            self.counts[rank] += change
+            rank += rank & -rank
+
+    def count_below(self, rank):
+        """
+        :return: The number of active segments with Y value numbers less
+            than rank.
+        """
+        total = 0
+        while rank > 0:
+            total += self.counts[rank]
+            rank -= rank & -rank
+        return total
+
+    def rank_holding(self, target):
+        """
+        :return: The Y value number holding the active segment number
+            target (counting from 0, lowest Y first).
+        """
+        rank = 0
+        step = self.top_bit
+        while step:
+            if rank + step <= len(self.y_values) and \
+                    self.counts[rank + step] <= target:
+                rank += step
+                target -= self.counts[rank]
+            step //= 2
+        return rank
+
+    def add(self, y, idx):
+        rank = bisect.bisect_left(self.y_values, y)
+        self.segments[rank][idx] = True
+        self.update(rank, 1)
+
+    def remove(self, y, idx):
+        rank = bisect.bisect_left(self.y_values, y)
+        del self.segments[rank][idx]
+        self.update(rank, -1)
+
+    def spanned(self, lesser, greater):
+        """
+        Find the active segments with Y values in [lesser, greater]. Each
+        occupied Y value in the span costs one O(log N) search.
+        :return: A generator of (y, segment index) pairs.
+        """
+        end_rank = bisect.bisect_right(self.y_values, greater)
+        seen = self.count_below(bisect.bisect_left(self.y_values, lesser))
+        while True:
+            rank = self.rank_holding(seen)
+            if rank >= end_rank:
+                return
+            y = self.y_values[rank]
+            for idx in self.segments[rank]:
+                yield y, idx
+            seen += len(self.segments[rank])
+
+
+def sweep_crossings(first_path, second_path):
+    """
+    Find every point where a segment of the first path crosses a segment of
+    the second, without comparing every pair of segments.
+
+    A vertical line is swept left to right across the grid. A horizontal
+    segment becomes active when the sweep reaches its left end and inactive
+    after its right end. When the sweep reaches a vertical segment, the
+    active horizontal segments of the other path whose Y values it spans
+    are exactly the ones it crosses. The active segments are kept in an
+    ActiveSegments per path, so this is O((N + K) log N) for N segments and
+    K crossings, rather than O(N^2).
+
+    Parallel segments that overlap along the same line are found by
+    collinear_pairs(), and reported at the points given by overlap_points().
+    :param first_path: A list of PathSegments.
+    :param second_path: A list of PathSegments.
+    :return: A generator of (first_path index, second_path index, Point)
+        for each crossing.
+    """
+    events = []
+    y_values = set()
+    for wire, path in enumerate((first_path, second_path)):
+        for idx, segment in enumerate(path):
+            x = segment.location.x
+            prev_x = segment.prev_location.x
+            y = segment.location.y
+            prev_y = segment.prev_location.y
+            if segment.is_vertical():
+                events.append((x, EVENT_QUERY, wire, idx,
+                               min(y, prev_y), max(y, prev_y)))
+            else:
+                events.append((min(x, prev_x), EVENT_INSERT, wire, idx, y))
+                events.append((max(x, prev_x), EVENT_REMOVE, wire, idx, y))
+                y_values.add(y)
+    # The first four values of each event are unique, so the sort never
+    # looks further.
+    events.sort()
+
+    y_values = sorted(y_values)
+    active = (ActiveSegments(y_values), ActiveSegments(y_values))
+    for event in events:
+        x, kind, wire, idx = event[:4]
+        if kind == EVENT_INSERT:
+            active[wire].add(event[4], idx)
+        elif kind == EVENT_REMOVE:
+            active[wire].remove(event[4], idx)
+        else:
+            lesser, greater = event[4:]
+            for y, other_idx in active[1 - wire].spanned(lesser, greater):
+                if wire == 0:
+                    yield idx, other_idx, Point(x, y)
+                else:
+                    yield other_idx, idx, Point(x, y)
+
+    for idx_1, idx_2 in collinear_pairs(first_path, second_path):
+        for location in overlap_points(first_path[idx_1], second_path[idx_2],
+                                       exclude_origin=idx_1 + idx_2 == 0):
+            yield idx_1, idx_2, location
+
+
+def grid_crossings(first_path, second_path, cell_size=None):
+    """
+    Find every point where a segment of the first path crosses a segment of
+    the second, using a uniform grid as a spatial index. Each segment of
+    the second path is filed under every grid cell its bounding box
+    touches, and a segment of the first path is only checked with
+    intersects() against the segments filed under its own cells. Wires
+    spread over a large area then cost close to linear time.
+    :param first_path: A list of PathSegments.
+    :param second_path: A list of PathSegments.
+    :param cell_size: The width and height of a grid cell. Defaults to the
+        average segment length, so a typical segment touches a few cells.
+    :return: A generator of (first_path index, second_path index, Point)
+        for each crossing.
+    """
+    if cell_size is None:
+        num_segments = len(first_path) + len(second_path)
+        total_length = sum(
+            abs(segment.location.x - segment.prev_location.x) +
+            abs(segment.location.y - segment.prev_location.y)
+            for path in (first_path, second_path) for segment in path)
+        cell_size = max(1, total_length // max(1, num_segments))
+
+    def cells_for(segment):
+        """
+        The grid cells touched by a segment's bounding box.
+        :param segment: A PathSegment.
+        :return: A generator of (cell x, cell y) tuples.
+        """
+        x_cells = sorted((segment.location.x // cell_size,
+                          segment.prev_location.x // cell_size))
+        y_cells = sorted((segment.location.y // cell_size,
+                          segment.prev_location.y // cell_size))
+        for cell_x in range(x_cells[0], x_cells[1] + 1):
+            for cell_y in range(y_cells[0], y_cells[1] + 1):
+                yield cell_x, cell_y
+
+    grid = {}
+    for idx_2, segment_2 in enumerate(second_path):
+        for cell in cells_for(segment_2):
+            try:
+                grid[cell].append(idx_2)
+            except KeyError:
+                grid[cell] = [idx_2]
+
+    for idx_1, segment_1 in enumerate(first_path):
+        for cell in cells_for(segment_1):
+            for idx_2 in grid.get(cell, ()):
+                segment_2 = second_path[idx_2]
+                does_intersect, location = segment_1.intersects(segment_2)
+                if does_intersect:
+                    locations = [location]
+                elif segment_1.is_vertical() == segment_2.is_vertical():
+                    locations = overlap_points(
+                        segment_1, segment_2,
+                        exclude_origin=idx_1 + idx_2 == 0)
+                else:
+                    continue
+                # Two segments may share more than one cell. Only report
+                # a crossing from the cell that it is in.
+                for location in locations:
+                    if (location.x // cell_size,
+                            location.y // cell_size) == cell:
+                        yield idx_1, idx_2, location
+
+
+def build_path(path_line):
+    """
+    Turn a path of the form R8,U5,L5,D3 into a list of PathSegments.
+    :param path_line: The path.
+    :return: A list of PathSegments.
+    """
+    path = []
+    prev_segment = None
+    for path_command in path_line.strip().split(','):
+        new_segment = PathSegment(prev_segment, path_command)
+        path.append(new_segment)
+        prev_segment = new_segment
+    return path
+
+
+def path_crossings(first_path, second_path):
+    """
+    Find all the crossings of two paths, with both measures of how far away
+    they are.
+    :param first_path: A list of PathSegments.
+    :param second_path: A list of PathSegments.
+    :return: A list of (Point, Manhattan distance, combined path distance)
+        tuples.
+    """
+    crossings = []
+    for idx_1, idx_2, location in sweep_crossings(first_path, second_path):
+        # Don't count intersection at the starting point origin.
+        # But do if later on they happen to intersect back at the
+        # origin. (The first segments may also overlap away from the
+        # origin, if they both head the same way.)
+        if idx_1 + idx_2 == 0 and location.x == 0 and location.y == 0:
+            continue
+        segment_1 = first_path[idx_1]
+        segment_2 = second_path[idx_2]
+        path_distance = segment_1.path_distance + segment_2.path_distance
+
+        # The intersection may have (probably did) happen before
+        # the end of the last two path segments.  We have to backtrack
+        # to the last intersection.
+        path_distance -= segment_1.retract_to(location)
+        path_distance -= segment_2.retract_to(location)
+
+        crossings.append((location,
+                          abs(location.x) + abs(location.y),
+                          path_distance))
+    return crossings
+
+
+def pair_crossings(wire_pair):
+    """
+    Find all the crossings of one pair of wires. Runs in a worker process,
+    so it takes the wires' path strings, which are cheaper to send than
+    lists of PathSegments.
+    :param wire_pair: (first wire number, second wire number,
+                       first path string, second path string)
+    :return: (first wire number, second wire number, crossings), where
+        crossings is as returned by path_crossings().
+    """
+    wire_1, wire_2, path_line_1, path_line_2 = wire_pair
+    return (wire_1, wire_2,
+            path_crossings(build_path(path_line_1), build_path(path_line_2)))
+
+
+def all_crossings(path_lines, processes=None):
+    """
+    Find the crossings of every pair of wires, spreading the pairs across a
+    pool of processes.
+    :param path_lines: A list of path strings, one per wire.
+    :param processes: The number of worker processes. Defaults to the
+        number of CPUs.
+    :return: A dict keyed by (first wire number, second wire number) of the
+        crossings of that pair, as returned by path_crossings().
+    """
+    wire_pairs = [(wire_1, wire_2, path_lines[wire_1], path_lines[wire_2])
+                  for wire_1, wire_2 in
+                  itertools.combinations(range(len(path_lines)), 2)]
+    with multiprocessing.Pool(processes) as pool:
+        return {(wire_1, wire_2): crossings
+                for wire_1, wire_2, crossings in
+                pool.imap_unordered(pair_crossings, wire_pairs)}
+
+
 def main():
-    first_path = []
-    second_path = []
+    # A file of wires, one per line, named on the command line has all of
+    # its pairs of wires checked.
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            path_lines = [line for line in f if line.strip()]
+        crossings_by_pair = all_crossings(path_lines)
+        for wire_1, wire_2 in sorted(crossings_by_pair):
+            crossings = crossings_by_pair[(wire_1, wire_2)]
+            if not crossings:
+                print("Wires {} and {} don't cross".format(wire_1, wire_2))
+                continue
+            closest = min(crossings, key=lambda crossing: crossing[1])
+            shortest = min(crossings, key=lambda crossing: crossing[2])
+            print("Wires {} and {} cross {} times. The closest crossing is "
+                  "{} at distance {}; the shortest path distance is {} at "
+                  "{}".format(wire_1, wire_2, len(crossings),
+                              closest[0], closest[1],
+                              shortest[2], shortest[0]))
+        return
+
     with open('3-1 sample input.txt') as f:
-        for path in (first_path, second_path):
-            prev_segment = None
-            path_line = f.readline()
-            for path_command in path_line.split(','):
-                new_segment = PathSegment(prev_segment, path_command)
-                path.append(new_segment)
-                prev_segment = new_segment
+        first_path = build_path(f.readline())
+        second_path = build_path(f.readline())
 
     # Now we have two complete paths.  Time to check for intersections.
-    # Currently O(N^2). Could figure out some sorting mechanism and maybe
-    # get more efficient.  But not now.
+    # sweep_crossings() finds them all without comparing every pair of
+    # segments.
     shortest = 999999999999999
-    for idx_1, segment_1 in enumerate(first_path):
-        for idx_2, segment_2 in enumerate(second_path):
-            does_intersect, location = segment_1.intersects(segment_2)
-            if does_intersect:
-                # Don't count intersection at the starting point origin.
-                # But do if later on they happen to intersect back at the
-                # origin.
-                if idx_1 + idx_2 == 0:
-                    continue
-                possible = segment_1.path_distance + segment_2.path_distance
-
-                # The intersection may have (probably did) happen before
-                # the end of the last two path segments.  We have to backtrack
-                # to the last intersection.
-                possible -= segment_1.retract_to(location)
-                possible -= segment_2.retract_to(location)
-
-                if possible < shortest:
-                    shortest = possible
-                # Since we're going for the shortest path, and walking the
-                # points in path order, once we have one intersection for
-                # first_path[x], second_path, there will be no shorter paths
-                # with this first_path segment. Break the second_path loop
-                # to pick up the next first_path segment.
-                break
+    for location, manhattan, path_distance in \
+            path_crossings(first_path, second_path):
+        if path_distance < shortest:
+            shortest = path_distance
 
     # If I've done everything right, we can now print out the path length,
     # and move on to the next problem!
@@ -22,34 +22,48 @@ Other than the range rule, the following are true:
 How many different passwords within the range given in your puzzle input meet
 these criteria?
 """
+import itertools
+
+
+def non_decreasing_combos(low, high):
+    """
+    Generate the combos in [low, high] that meet the criteria, without
+    looking at every number in the range. A combo's digits never decrease,
+    so itertools.combinations_with_replacement() generates exactly the
+    candidate digit sequences, in increasing order, and there are only a
+    few thousand six digit ones. Since the digits are sorted, any repeated
+    digit is a pair of adjacent digits.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :return: A generator of the combos, in increasing order.
+    """
+    for num_digits in range(len(str(low)), len(str(high)) + 1):
+        # No 0s: a 0 could only lead, and then the combo would be shorter.
+        for digits in itertools.combinations_with_replacement(
+                range(1, 10), num_digits):
+            combo = 0
+            for digit in digits:
+                combo = combo * 10 + digit
+            if combo < low:
+                continue
+            if combo > high:
+                break
+            if len(set(digits)) < len(digits):
+                yield combo
+
 
 #
 # Is this harder than it seems at first?
-# Try a brute force attack.
+# A brute force attack over every number in the range works, but only the
+# non-decreasing candidates need checking, and those can be generated
+# directly.
 #
 
 input_range = '356261-846303'
 low_str, high_str = input_range.split('-')
 low = int(low_str)
 high = int(high_str)
-count = 0
-for n in range(low, high + 1):
-    # These tests are easier performing textually, I think.
-    trial = str(n)
-    found_pair = False
-    decreased = False
-    for pos in range(len(trial) - 1):
-        # Textual comparisons for value work, since we know that they are
-        # all numbers.
-        # Digits never decrease
-        if trial[pos + 1] < trial[pos]:
-            # Failure.
-            decreased = True
-            break
-        if trial[pos + 1] == trial[pos]:
-            found_pair = True
-    if found_pair and not decreased:
-        count += 1
+count = sum(1 for combo in non_decreasing_combos(low, high))
 print("{} possible combinations".format(count))
 
 # Nope.  Not harder than it seems.
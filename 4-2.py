@@ -44,6 +44,15 @@ all of the criteria?
 
 Your puzzle input is still 356261-846303.
 """
+import functools
+import itertools
+import multiprocessing
+import sys
+try:
+    import numpy as np
+except ImportError:
+    # check_combo_batch() is unavailable without NumPy.
+    np = None
 
 
 def check_combo_criteria(combo):
@@ -104,15 +113,434 @@ def check_combo_criteria(combo):
     return found_pair and not decreased
 
 
+def check_combo_digits(combo, exact_pair=True):
+    """
+    The same criteria as check_combo_criteria(), using integer arithmetic
+    instead of converting the combo to a string. The digits are pulled out
+    once, by division, into a fixed six entry list, and then checked in a
+    single pass that tracks the length of the current run of equal digits.
+    :param combo: the combination to check.
+    :param exact_pair: If True, apply part two's rule that the pair must not
+        be part of a larger group. If False, apply part one's rule that any
+        group of two or more will do.
+    :return: Boolean True if the combo meets the criteria.
+    """
+    # 1. The combo must be six digits long.
+    if combo < 100000 or combo > 999999:
+        return False
+
+    digits = [0] * 6
+    for pos in range(5, -1, -1):
+        combo, digits[pos] = divmod(combo, 10)
+
+    found_pair = False
+    run = 1
+    for pos in range(1, 6):
+        # 2. Digits never decrease
+        if digits[pos] < digits[pos - 1]:
+            return False
+        # 3. Track runs of repeated digits.
+        if digits[pos] == digits[pos - 1]:
+            run += 1
+        else:
+            if run == 2 or (run > 2 and not exact_pair):
+                found_pair = True
+            run = 1
+    return found_pair or run == 2 or (run > 2 and not exact_pair)
+
+
+def check_combo_batch(low, high, exact_pair=True, chunk_size=1 << 20):
+    """
+    Check every combo in [low, high] with NumPy. Each chunk of candidates
+    becomes an (N, 6) matrix of digits, and the criteria are applied to all
+    the rows at once: the differences between neighbouring digits must
+    never be negative, and a zero difference (a repeated digit) is part of
+    an exact pair when the differences either side of it aren't zero.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :param exact_pair: If True, apply part two's rule that the pair must not
+        be part of a larger group. If False, apply part one's rule that any
+        group of two or more will do.
+    :param chunk_size: The number of candidates to check at once.
+    :return: An array of the combos meeting the criteria.
+    """
+    # 1. The combo must be six digits long.
+    low = max(low, 100000)
+    high = min(high, 999999)
+    powers = 10 ** np.arange(5, -1, -1, dtype=np.int64)
+
+    found = []
+    for start in range(low, high + 1, chunk_size):
+        candidates = np.arange(start, min(start + chunk_size, high + 1),
+                               dtype=np.int64)
+        digits = (candidates[:, None] // powers) % 10
+        diffs = np.diff(digits, axis=1)
+
+        # 2. Digits never decrease
+        valid = (diffs >= 0).all(axis=1)
+
+        # 3. Repeats
+        repeats = diffs == 0
+        if exact_pair:
+            padded = np.pad(repeats, ((0, 0), (1, 1)))
+            repeats &= ~padded[:, :-2] & ~padded[:, 2:]
+        valid &= repeats.any(axis=1)
+        found.append(candidates[valid])
+
+    if not found:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(found)
+
+
+def non_decreasing_combos(low, high, exact_pair=True):
+    """
+    Generate the combos in [low, high] that meet the criteria, without
+    looking at every number in the range. A combo's digits never decrease,
+    so it is fully described by how many of each digit it has, and
+    itertools.combinations_with_replacement() generates exactly those
+    digit sequences, in increasing order. There are only a few thousand
+    six digit ones. (None contain a 0: a 0 could only lead, and then the
+    combo would be shorter.)
+
+    Since the digits are sorted, a digit's run length is just its count.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :param exact_pair: If True, apply part two's rule that the pair must not
+        be part of a larger group. If False, apply part one's rule that any
+        group of two or more will do.
+    :return: A generator of the combos, in increasing order.
+    """
+    for num_digits in range(len(str(low)), len(str(high)) + 1):
+        for digits in itertools.combinations_with_replacement(
+                range(1, 10), num_digits):
+            combo = 0
+            for digit in digits:
+                combo = combo * 10 + digit
+            if combo < low:
+                continue
+            if combo > high:
+                break
+            run_lengths = [digits.count(digit) for digit in set(digits)]
+            if exact_pair:
+                if 2 not in run_lengths:
+                    continue
+            elif max(run_lengths) < 2:
+                continue
+            yield combo
+
+
+def count_combos(low, high, exact_pair=True, num_digits=None):
+    """
+    Count the combos in [low, high] that meet the criteria without
+    generating them, using dynamic programming over the digits. Working
+    left to right, all that matters about the digits chosen so far is the
+    last digit, how long its run is (1, 2, or more), whether a qualifying
+    pair has already been seen, and whether the digits so far equal the
+    bound's (so the next digit is limited by the bound's next digit). There
+    are only a few hundred such states per digit position, so this works
+    for ranges far too large to enumerate, e.g. 18 digits.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :param exact_pair: If True, apply part two's rule that the pair must not
+        be part of a larger group. If False, apply part one's rule that any
+        group of two or more will do.
+    :param num_digits: If given, only count combos with this many digits.
+    :return: The number of combos meeting the criteria.
+    """
+    if num_digits is not None:
+        low = max(low, 10 ** (num_digits - 1))
+        high = min(high, 10 ** num_digits - 1)
+    if low > high:
+        return 0
+
+    def pair_ended(run):
+        # Does a run of this length, now ended, meet the pair rule?
+        if exact_pair:
+            return run == 2
+        return run >= 2
+
+    def count_up_to(bound):
+        """
+        Count the qualifying combos in [1, bound].
+        """
+        if bound <= 0:
+            return 0
+        bound_digits = [int(digit) for digit in str(bound)]
+
+        @functools.lru_cache(maxsize=None)
+        def count_from(pos, last, run, found, tight):
+            # last is 0 until the first non-zero digit; shorter numbers
+            # are handled as having leading zeros.
+            if pos == len(bound_digits):
+                return int(last != 0 and (found or pair_ended(run)))
+            highest = bound_digits[pos] if tight else 9
+            total = 0
+            for digit in range(last, highest + 1):
+                next_tight = tight and digit == highest
+                if digit == 0:
+                    # Still a leading zero.
+                    total += count_from(pos + 1, 0, 0, False, next_tight)
+                elif digit == last:
+                    total += count_from(pos + 1, digit, min(run + 1, 3),
+                                        found, next_tight)
+                else:
+                    total += count_from(pos + 1, digit, 1,
+                                        found or pair_ended(run),
+                                        next_tight)
+            return total
+
+        return count_from(0, 0, 0, False, True)
+
+    return count_up_to(high) - count_up_to(low - 1)
+
+
+class Rule(object):
+    """
+    A password rule. Candidates are built a digit at a time, left to
+    right, and a rule may prune a candidate as soon as a digit is chosen
+    (allows()), check a finished candidate (accepts()), or both. Rules only
+    override the methods they need.
+    """
+    # The number of digits the rule requires, if it requires one.
+    num_digits = None
+
+    def allows(self, prefix, digit, remaining):
+        """
+        :param prefix: The list of digits chosen so far.
+        :param digit: The next digit being considered.
+        :param remaining: How many digits will follow this one.
+        :return: False if no candidate starting with prefix and digit can
+            meet the rule.
+        """
+        return True
+
+    def accepts(self, digits):
+        """
+        :param digits: The list of digits of a finished candidate.
+        :return: True if the candidate meets the rule.
+        """
+        return True
+
+
+class DigitCountRule(Rule):
+    """
+    The combo has exactly num_digits digits.
+    """
+    def __init__(self, num_digits):
+        self.num_digits = num_digits
+
+
+class RangeRule(Rule):
+    """
+    The combo is in [low, high]. A prefix is pruned when no way of
+    finishing it lands in the range.
+    """
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def allows(self, prefix, digit, remaining):
+        value = 0
+        for prefix_digit in prefix:
+            value = value * 10 + prefix_digit
+        least = (value * 10 + digit) * 10 ** remaining
+        greatest = least + 10 ** remaining - 1
+        return greatest >= self.low and least <= self.high
+
+
+class NonDecreasingRule(Rule):
+    """
+    Digits never decrease going left to right.
+    """
+    def allows(self, prefix, digit, remaining):
+        return not prefix or digit >= prefix[-1]
+
+
+class ForbiddenDigitsRule(Rule):
+    """
+    None of the given digits appear in the combo.
+    """
+    def __init__(self, digits):
+        self.digits = frozenset(digits)
+
+    def allows(self, prefix, digit, remaining):
+        return digit not in self.digits
+
+
+class RunLengthRule(Rule):
+    """
+    At least one run of repeated digits has a length in [min_length,
+    max_length]. Part one's rule is RunLengthRule(2); part two's is
+    RunLengthRule(2, 2).
+    """
+    def __init__(self, min_length, max_length=None):
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def accepts(self, digits):
+        run = 1
+        for pos in range(1, len(digits) + 1):
+            if pos < len(digits) and digits[pos] == digits[pos - 1]:
+                run += 1
+                continue
+            if run >= self.min_length and \
+                    (self.max_length is None or run <= self.max_length):
+                return True
+            run = 1
+        return False
+
+
+class CompiledRules(object):
+    """
+    A set of rules fused into a single enumerator. Every rule's prefix
+    check is applied as each digit is chosen, so a candidate is abandoned
+    as early as any one rule allows, and adding a rule adds a check to the
+    one pass rather than another pass over the range.
+    """
+    def __init__(self, rules):
+        """
+        :param rules: A list of Rules. Between them they must fix the number
+            of digits, with a DigitCountRule or a RangeRule.
+        """
+        self.rules = list(rules)
+        # Only gather the methods rules actually override.
+        self.prefix_checks = [rule.allows for rule in self.rules
+                              if type(rule).allows is not Rule.allows]
+        self.final_checks = [rule.accepts for rule in self.rules
+                             if type(rule).accepts is not Rule.accepts]
+
+        digit_counts = {rule.num_digits for rule in self.rules
+                        if rule.num_digits is not None}
+        ranges = [rule for rule in self.rules if isinstance(rule, RangeRule)]
+        if len(digit_counts) > 1:
+            self.lengths = []
+        elif digit_counts:
+            self.lengths = list(digit_counts)
+        elif ranges:
+            self.lengths = list(range(
+                len(str(max(1, max(rule.low for rule in ranges)))),
+                len(str(min(rule.high for rule in ranges))) + 1))
+        else:
+            raise ValueError("The rules must limit the number of digits, "
+                             "with a DigitCountRule or a RangeRule")
+
+    def combos(self):
+        """
+        :return: A generator of the combos meeting all the rules, in
+            increasing order.
+        """
+        for num_digits in self.lengths:
+            for digits in self.extend([], num_digits):
+                combo = 0
+                for digit in digits:
+                    combo = combo * 10 + digit
+                yield combo
+
+    def extend(self, prefix, num_digits):
+        """
+        Generate the ways of finishing prefix that meet all the rules.
+        :param prefix: The list of digits chosen so far.
+        :param num_digits: The number of digits in a finished candidate.
+        :return: A generator of lists of digits.
+        """
+        if len(prefix) == num_digits:
+            if all(check(prefix) for check in self.final_checks):
+                yield list(prefix)
+            return
+        remaining = num_digits - len(prefix) - 1
+        # No leading zeros.
+        for digit in range(0 if prefix else 1, 10):
+            if all(check(prefix, digit, remaining)
+                   for check in self.prefix_checks):
+                prefix.append(digit)
+                yield from self.extend(prefix, num_digits)
+                prefix.pop()
+
+    def count(self):
+        """
+        :return: The number of combos meeting all the rules.
+        """
+        return sum(1 for combo in self.combos())
+
+
+def compile_rules(rules):
+    """
+    :param rules: A list of Rules.
+    :return: A CompiledRules for them.
+    """
+    return CompiledRules(rules)
+
+
+def shard_range(low, high, prefix_len=3):
+    """
+    Split [low, high] into shards of numbers sharing their leading
+    prefix_len digits. A shard whose prefix already has a decreasing digit
+    can't hold a combo, so it is left out.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :param prefix_len: The number of leading digits shared in a shard.
+    :return: A list of (start, end) inclusive ranges.
+    """
+    shard_digits = max(0, len(str(high)) - prefix_len)
+    shard_size = 10 ** shard_digits
+    shards = []
+    for prefix in range(low // shard_size, high // shard_size + 1):
+        prefix_str = str(prefix)
+        if prefix and any(prefix_str[pos + 1] < prefix_str[pos]
+                          for pos in range(len(prefix_str) - 1)):
+            continue
+        shards.append((max(low, prefix * shard_size),
+                       min(high, (prefix + 1) * shard_size - 1)))
+    return shards
+
+
+def count_shard(shard):
+    """
+    Count the combos in one shard by checking every number in it. Runs in
+    a worker process.
+    :param shard: A (start, end) inclusive range from shard_range().
+    :return: The number of combos meeting the criteria.
+    """
+    start, end = shard
+    count = 0
+    for combo_candidate in range(start, end + 1):
+        if check_combo_criteria(combo_candidate):
+            count += 1
+    return count
+
+
+def parallel_count(low, high, processes=None, prefix_len=3):
+    """
+    Count the combos in [low, high] by checking every number, with the
+    shards from shard_range() spread across a pool of processes.
+    :param low: The low end of the range.
+    :param high: The high end of the range.
+    :param processes: The number of worker processes. Defaults to the
+        number of CPUs.
+    :param prefix_len: The number of leading digits shared in a shard.
+    :return: The number of combos meeting the criteria.
+    """
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.imap_unordered(
+            count_shard, shard_range(low, high, prefix_len)))
+
+
 def main():
     input_range = '356261-846303'
     low_str, high_str = input_range.split('-')
     low = int(low_str)
     high = int(high_str)
-    count = 0
-    for combo_candidate in range(low, high + 1):
-        if check_combo_criteria(combo_candidate):
-            count += 1
+    if '--parallel' in sys.argv[1:]:
+        # Check every candidate, as check_combo_criteria() defines the
+        # rules, but spread across all cores.
+        count = parallel_count(low, high)
+        print("{} possible combinations".format(count))
+        return
+
+    # check_combo_criteria() also requires six digits.
+    low = max(low, 100000)
+    high = min(high, 999999)
+    count = count_combos(low, high, num_digits=6)
     print("{} possible combinations".format(count))
 
 
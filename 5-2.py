@@ -77,14 +77,128 @@ import machine_operation_implementations as op
 import machine_defs as md
 
 
-def decode_inst(pc, memory):
+def grow_memory(memory, min_size=0):
+    """
+    Memory beyond the loaded program is available and starts out as zero.
+    Rather than checking every access, we let the list raise IndexError and
+    grow it here. Memory is grown in place (callers hold a reference to the
+    list) and at least doubled, so repeated faults are rare.
+    :param memory: The memory of our machine implemented as a list.
+    :param min_size: The minimum size the memory must have after growing.
+    :return: None
+    """
+    new_size = max(min_size, 2 * len(memory), 1)
+    memory.extend([0] * (new_size - len(memory)))
+
+
+class LoopDetector(object):
+    """
+    Watches a running program for an exact repeat of its state (pc, relative
+    base and memory). A program that repeats a state without reading input
+    in between will repeat it forever.
+
+    Hashing all of memory at every check would cost as much as running the
+    program, so the memory hash is kept up to date incrementally: it is the
+    XOR of a hash of every (address, value) pair with a non-zero value, and
+    each write swaps the old pair out and the new one in. Zero values don't
+    contribute, so growing memory doesn't change the hash.
+
+    The state is sampled every check_interval steps. A repeated hash is only
+    a candidate; the state is copied and the program is run one more
+    period, and only an exact match of the copy is reported as a loop.
+    """
+    def __init__(self, memory, check_interval=1000):
+        """
+        :param memory: The memory of the machine, as loaded.
+        :param check_interval: The number of steps between state samples.
+        """
+        self.check_interval = check_interval
+        self.memory_hash = 0
+        for address, value in enumerate(memory):
+            if value:
+                self.memory_hash ^= hash((address, value))
+        self.step = 0
+        # Maps state hash to the step at which it was seen.
+        self.seen = {}
+        # When verifying a candidate: (step to compare at, first step,
+        #                              period, pc, relative base, memory copy)
+        self.candidate = None
+
+    def record_write(self, memory, address, value):
+        """
+        Update the memory hash for a write that is about to happen.
+        :param memory: The memory of the machine.
+        :param address: The address being written.
+        :param value: The value being written.
+        :return: None
+        """
+        try:
+            old_value = memory[address]
+        except IndexError:
+            old_value = 0
+        if old_value:
+            self.memory_hash ^= hash((address, old_value))
+        if value:
+            self.memory_hash ^= hash((address, value))
+
+    def input_received(self):
+        """
+        States seen before an input can't be compared to states after it,
+        since the input may have been different.
+        :return: None
+        """
+        self.seen = {}
+        self.candidate = None
+
+    def tick(self, pc, relative_base, memory):
+        """
+        Called once per executed instruction, with the state after it.
+        :param pc: The program counter.
+        :param relative_base: The relative base register.
+        :param memory: The memory of the machine.
+        :return: None
+        :raises: op.LoopException if the program has entered a loop.
+        """
+        self.step += 1
+        if self.step % self.check_interval:
+            return
+
+        if self.candidate is not None:
+            verify_step, first_step, period, cand_pc, cand_base, \
+                cand_memory = self.candidate
+            if self.step == verify_step:
+                self.candidate = None
+                cand_len = len(cand_memory)
+                if pc == cand_pc and relative_base == cand_base and \
+                        memory[:cand_len] == cand_memory and \
+                        not any(memory[cand_len:]):
+                    raise op.LoopException(pc, first_step, period)
+            return
+
+        state_hash = hash((pc, relative_base, self.memory_hash))
+        try:
+            first_step = self.seen[state_hash]
+        except KeyError:
+            self.seen[state_hash] = self.step
+            return
+
+        # A candidate. Run one more period and compare.
+        period = self.step - first_step
+        self.candidate = (self.step + period, first_step, period, pc,
+                          relative_base, list(memory))
+
+
+def decode_inst(pc, memory, relative_base=0):
     """
     decode a single instruction
     :param pc: the current program counter (location in memory)
     :param memory: the machine's memory
+    :param relative_base: the current value of the relative base register,
+        used by parameters in relative mode.
     :return: (param_list, op_function, result_loc, instruction_width)
     """
     opcode = memory[pc]
+    raw_opcode = opcode
 
     def split_opcode(opcode):
         """
@@ -131,6 +245,8 @@ def decode_inst(pc, memory):
             params.append(memory[absolute_parameter_loc])
         elif param_mode == md.PARAM_MODE_IMMEDIATE:
             params.append(absolute_parameter_loc)
+        elif param_mode == md.PARAM_MODE_RELATIVE:
+            params.append(memory[relative_base + absolute_parameter_loc])
         else:
             # Oops!  Bad param mode.  Report and halt.
             print("Bad parameter mode encountered: {}. Halting".
@@ -139,6 +255,13 @@ def decode_inst(pc, memory):
 
     result_loc = memory[op_def['result_loc'] + pc]
 
+    # The result location may also be in relative mode. Its mode digit
+    # is found the same way as the parameters' mode digits, by its position
+    # in the instruction.
+    if (raw_opcode // 10 ** (op_def['result_loc'] + 1)) % 10 == \
+            md.PARAM_MODE_RELATIVE:
+        result_loc += relative_base
+
     return (params,
             op_def['op_function'],
             result_loc,
@@ -146,18 +269,32 @@ def decode_inst(pc, memory):
             )
 
 
-def execute(memory):
+def execute(memory, detect_loops=False, check_interval=1000):
     """
     Loop over the instructions until we get a halt.
     :param memory: The memory of our machine implemented as a list.
+    :param detect_loops: If True, watch for the program entering a state it
+        has been in before (see LoopDetector).
+    :param check_interval: The number of steps between loop checks.
     :return: None
+    :raises: op.LoopException if detect_loops is set and the program loops.
     """
     pc = 0
+    relative_base = 0
+    loop_detector = None
+    if detect_loops:
+        loop_detector = LoopDetector(memory, check_interval)
 
     while True:
         try:
-            params, op_function, result_loc, inst_width = \
-                decode_inst(pc, memory)
+            try:
+                params, op_function, result_loc, inst_width = \
+                    decode_inst(pc, memory, relative_base)
+            except IndexError:
+                # The instruction read past the end of memory. Grow it and
+                # decode the instruction again.
+                grow_memory(memory)
+                continue
 
             # We know everything we need to execute the instruction.
             result = op_function(params)
@@ -167,9 +304,18 @@ def execute(memory):
             if op_function not in (
                 op.output,
                 op.jump_if_true,
-                op.jump_if_false
+                op.jump_if_false,
+                op.adjust_relative_base,
             ):
-                memory[result_loc] = result
+                if loop_detector is not None:
+                    loop_detector.record_write(memory, result_loc, result)
+                    if op_function is op.input_func:
+                        loop_detector.input_received()
+                try:
+                    memory[result_loc] = result
+                except IndexError:
+                    grow_memory(memory, result_loc + 1)
+                    memory[result_loc] = result
         except op.HaltException:
             return
 
@@ -184,6 +330,13 @@ def execute(memory):
             pc = result
         else:
             pc += inst_width
+            # SPECIAL CASE
+            # Adjusting the relative base returns the offset to apply.
+            if op_function is op.adjust_relative_base:
+                relative_base += result
+
+        if loop_detector is not None:
+            loop_detector.tick(pc, relative_base, memory)
 
 
 def main():
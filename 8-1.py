@@ -41,6 +41,15 @@ To make sure the image wasn't corrupted during transmission, the Elves would
 like you to find the layer that contains the fewest 0 digits. On that layer,
 what is the number of 1 digits multiplied by the number of 2 digits?
 """
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to working with layer strings.
+    np = None
+
+# Translations of pixel digits into bitplane digits, for pack_layer().
+OPAQUE_TABLE = str.maketrans('012', '110')
+COLOR_TABLE = str.maketrans('012', '010')
 
 
 def layerize(pixels, rows, columns):
@@ -84,28 +93,131 @@ def count_characters(candidate, characters):
     return counts
 
 
+def decode_image(pixels, rows, columns):
+    """
+    Parse a stream of pixels straight into a NumPy array of layers, rather
+    than a list of layer strings.
+    :param pixels: The data stream of pixel values, as a str or bytes.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: a uint8 array of shape (layers, rows, columns).
+    """
+    if isinstance(pixels, str):
+        pixels = pixels.encode()
+    data = np.frombuffer(pixels.strip(), dtype=np.uint8) - ord('0')
+
+    # Check that we have a valid data stream.
+    pixels_per_layer = columns * rows
+    if len(data) % pixels_per_layer != 0:
+        raise ValueError("The input data stream {} is the wrong length for a "
+                         "picture of {} rows by {} columns".format(
+                            len(data), rows, columns
+                            ))
+    return data.reshape(-1, rows, columns)
+
+
+def layer_digit_counts(image):
+    """
+    Count every digit in every layer at once, with a single bincount. Each
+    layer's digits are offset by 10 times the layer number so that each
+    layer gets its own 10 bins.
+    :param image: a uint8 array of layers, as from decode_image().
+    :return: an array of shape (layers, 10); entry [layer, digit] is the
+        number of times digit appears in layer.
+    """
+    num_layers = len(image)
+    offsets = 10 * np.arange(num_layers)[:, None]
+    binned = image.reshape(num_layers, -1).astype(np.intp) + offsets
+    return np.bincount(binned.ravel(), minlength=10 * num_layers).reshape(
+        num_layers, 10)
+
+
+def pack_layer(layer):
+    """
+    Pack a layer of pixels into two bitplanes held in Python ints, one bit
+    per pixel with the first pixel as the most significant bit:
+        opaque: 1 where the pixel is 0 or 1 (not transparent)
+        color:  1 where the pixel is 1 (white)
+    Whole layers can then be combined with bitwise operations instead of
+    a loop over pixels.
+    :param layer: A layer of pixels.
+    :return: (opaque, color)
+    """
+    layer = ''.join(layer)
+    opaque = int(layer.translate(OPAQUE_TABLE), 2)
+    color = int(layer.translate(COLOR_TABLE), 2)
+    return opaque, color
+
+
+def packed_digit_counts(opaque, color, layer_len):
+    """
+    Count the 0, 1 and 2 pixels of a packed layer by counting bits.
+    :param opaque: The layer's opaque bitplane, from pack_layer().
+    :param color: The layer's color bitplane, from pack_layer().
+    :param layer_len: The number of pixels in the layer.
+    :return: (number of 0s, number of 1s, number of 2s)
+    """
+    return ((opaque & ~color).bit_count(),
+            color.bit_count(),
+            layer_len - opaque.bit_count())
+
+
+def layer_histograms(f, rows, columns):
+    """
+    Count the 0, 1 and 2 digits of every layer in a single pass over an
+    image file, reading one layer at a time. Each count is a bytes.count()
+    over the whole layer, so there is no Python loop over pixels.
+    :param f: The image file, opened in binary mode.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: a generator of (number of 0s, number of 1s, number of 2s), one
+        per layer.
+    """
+    pixels_per_layer = columns * rows
+    while True:
+        layer = f.read(pixels_per_layer)
+        if not layer.strip():
+            # End of the data, perhaps with a trailing newline.
+            return
+        if len(layer) != pixels_per_layer:
+            raise ValueError("The input data stream ends with a partial "
+                             "layer of {} pixels for a picture of {} rows by "
+                             "{} columns".format(len(layer), rows, columns))
+        yield layer.count(b'0'), layer.count(b'1'), layer.count(b'2')
+
+
+def fewest_zeros_layer(f, rows, columns):
+    """
+    Find the layer with the fewest 0 digits, and its checksum, in one pass
+    over an image file that holds only one layer at a time.
+    :param f: The image file, opened in binary mode.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: (layer index, number of 1s, number of 2s, checksum) for that
+        layer, where the checksum is the number of 1s times the number of
+        2s.
+    """
+    best = None
+    for idx, (zeros, ones, twos) in enumerate(layer_histograms(f, rows,
+                                                               columns)):
+        if best is None or zeros < best[0]:
+            best = (zeros, idx, ones, twos)
+    if best is None:
+        raise ValueError("The image has no layers")
+    zeros, idx, ones, twos = best
+    return idx, ones, twos, ones * twos
+
+
 def main():
     """
     8-2 will invariably make this more complicated, but for this one, we
     only care about layers.
     :return: None
     """
-    with open('8 input.txt') as f:
-        pixels = f.readline()
-
-    smallest_num_zeroes = 9999999999999999
-    best_layer = None
-    layers = layerize(pixels, 6, 25)
-    for idx, layer in enumerate(layers):
-        num_zeroes = count_characters(layer, ('0'))['0']
-        if num_zeroes < smallest_num_zeroes:
-            smallest_num_zeroes = num_zeroes
-            best_layer = idx
-
-    # Now count the number of ones and twos.
-    counts = count_characters(layers[best_layer], ('1', '2'))
+    with open('8 input.txt', 'rb') as f:
+        best_layer, ones, twos, checksum = fewest_zeros_layer(f, 6, 25)
     print("There are {} '1's and {} '2's, which multiply to {}".format(
-            counts['1'], counts['2'], counts['1'] * counts['2']))
+            ones, twos, checksum))
 
 
 if __name__ == '__main__':
@@ -47,6 +47,34 @@ So, the final image looks like this:
 
 What message is produced after decoding your image?
 """
+import mmap
+import multiprocessing
+import struct
+import sys
+import zlib
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to working with layer strings.
+    np = None
+
+# Translations of pixel digits into bitplane digits, for pack_layer().
+OPAQUE_TABLE = str.maketrans('012', '110')
+COLOR_TABLE = str.maketrans('012', '010')
+
+# Gray levels for merged pixels, given either as digit characters or as
+# values: black is 0, white is 255, and a pixel that stayed transparent is
+# mid gray.
+GRAY_TABLE = bytes.maketrans(b'\x00\x01\x02012', b'\x00\xff\x80\x00\xff\x80')
+
+# Terminal block characters for a (top pixel white, bottom pixel white)
+# pair of pixels.
+BLOCKS = {
+    (False, False): ' ',
+    (True, False): '\u2580',  # Upper half block
+    (False, True): '\u2584',  # Lower half block
+    (True, True): '\u2588',   # Full block
+}
 
 
 def make_into_pic(layer, rows, columns):
@@ -70,6 +98,98 @@ def make_into_pic(layer, rows, columns):
     return rows_list
 
 
+def gray_levels(merged):
+    """
+    Convert a merged layer to one byte per pixel gray levels for the
+    output backends.
+    :param merged: The merged pixels, as a list or str of '0', '1' and '2'
+        (from merge_layers()) or a NumPy array of 0, 1 and 2 (from
+        merge_image() or stream_merge()).
+    :return: bytes of gray levels, one per pixel.
+    """
+    if isinstance(merged, str):
+        pixels = merged.encode()
+    elif isinstance(merged, list):
+        pixels = ''.join(merged).encode()
+    else:
+        pixels = merged.astype('uint8').tobytes()
+    return pixels.translate(GRAY_TABLE)
+
+
+def write_pgm(path, merged, rows, columns):
+    """
+    Write a merged layer as a binary (P5) PGM image.
+    :param path: The path to write to.
+    :param merged: The merged pixels, as for gray_levels().
+    :param rows: The number of rows in the picture.
+    :param columns: Number of columns in each scan line (row) of the picture.
+    :return: None
+    """
+    with open(path, 'wb') as f:
+        f.write('P5\n{} {}\n255\n'.format(columns, rows).encode())
+        f.write(gray_levels(merged))
+
+
+def write_png(path, merged, rows, columns):
+    """
+    Write a merged layer as an 8 bit grayscale PNG image. The scan lines
+    are compressed one at a time, so the only full-size buffer is the gray
+    levels themselves.
+    :param path: The path to write to.
+    :param merged: The merged pixels, as for gray_levels().
+    :param rows: The number of rows in the picture.
+    :param columns: Number of columns in each scan line (row) of the picture.
+    :return: None
+    """
+    def write_chunk(f, chunk_type, data):
+        f.write(struct.pack('>I', len(data)))
+        f.write(chunk_type)
+        f.write(data)
+        f.write(struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+    pixels = gray_levels(merged)
+    compressor = zlib.compressobj()
+    compressed = []
+    for row_idx in range(rows):
+        # Each scan line starts with its filter type; 0 is no filtering.
+        compressed.append(compressor.compress(b'\x00'))
+        compressed.append(compressor.compress(
+            pixels[row_idx * columns: (row_idx + 1) * columns]))
+    compressed.append(compressor.flush())
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        # Width, height, bit depth 8, color type 0 (grayscale), default
+        # compression, filtering and no interlacing.
+        write_chunk(f, b'IHDR',
+                    struct.pack('>IIBBBBB', columns, rows, 8, 0, 0, 0, 0))
+        write_chunk(f, b'IDAT', b''.join(compressed))
+        write_chunk(f, b'IEND', b'')
+
+
+def render_blocks(merged, rows, columns):
+    """
+    Render a merged layer for a terminal using block characters. Each line
+    of text holds two rows of pixels, the upper and lower halves of each
+    character cell, so the picture keeps roughly its proportions. White
+    pixels are drawn; black and transparent ones are left blank.
+    :param merged: The merged pixels, as for gray_levels().
+    :param rows: The number of rows in the picture.
+    :param columns: Number of columns in each scan line (row) of the picture.
+    :return: a generator of lines of text.
+    """
+    pixels = gray_levels(merged)
+    for row_idx in range(0, rows, 2):
+        top = pixels[row_idx * columns: (row_idx + 1) * columns]
+        if row_idx + 1 < rows:
+            bottom = pixels[(row_idx + 1) * columns:
+                            (row_idx + 2) * columns]
+        else:
+            bottom = bytes(columns)
+        yield ''.join(BLOCKS[(top_pixel == 255, bottom_pixel == 255)]
+                      for top_pixel, bottom_pixel in zip(top, bottom))
+
+
 def merge_layers(layers):
     """
     Merge all the layers into one, using the rules:
@@ -77,25 +197,289 @@ def merge_layers(layers):
     - 1 is white, and won't be changed by later layers.
     - 2 is "transparent", no action at this time, will be set by a later
       layer.
-    :param layers: A list of layers of pixels
+    Layers are merged front to back, keeping track of which pixels are
+    still transparent. Once none are, the remaining layers can't change
+    anything, so we stop without reading them. Given a generator such as
+    read_layers(), that means the rest of the image is never read at all.
+    :param layers: A list (or other iterable) of layers of pixels
     :return: A list the same length as each of the input layers, with the
         merged values, either 0 (black) or 1 (white).
     """
-    # All layers are the same length
-    layer_len = len(layers[0])
+    result = None
+    unresolved = None
+    for layer in layers:
+        if result is None:
+            # All layers are the same length.
+            # Create the result layer and initialize to '2'.
+            result = ['2'] * len(layer)
+            unresolved = range(len(layer))
 
-    # Create the result layer and initialize to '2'.
-    result = ['2'] * layer_len
+        still_transparent = []
+        for idx in unresolved:
+            pixel = layer[idx]
+            if pixel == '2':
+                still_transparent.append(idx)
+            else:
+                result[idx] = pixel
+        unresolved = still_transparent
+        if not unresolved:
+            # Every pixel is set.
+            break
+    return result
 
-    for layer in layers:
-        for idx in range(layer_len):
-            if result[idx] != '2':
-                # This pixel is already set.
+
+def read_layers(f, rows, columns):
+    """
+    Read an image from an open file one layer at a time.
+    :param f: The open image file.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: a generator of layers of pixels.
+    """
+    pixels_per_layer = columns * rows
+    while True:
+        layer = f.read(pixels_per_layer)
+        if not layer.strip():
+            # End of the data, perhaps with a trailing newline.
+            return
+        if len(layer) != pixels_per_layer:
+            raise ValueError("The input data stream ends with a partial "
+                             "layer of {} pixels for a picture of {} rows by "
+                             "{} columns".format(len(layer), rows, columns))
+        yield layer
+
+
+def pack_layer(layer):
+    """
+    Pack a layer of pixels into two bitplanes held in Python ints, one bit
+    per pixel with the first pixel as the most significant bit:
+        opaque: 1 where the pixel is 0 or 1 (not transparent)
+        color:  1 where the pixel is 1 (white)
+    Whole layers can then be combined with bitwise operations instead of
+    a loop over pixels.
+    :param layer: A layer of pixels.
+    :return: (opaque, color)
+    """
+    layer = ''.join(layer)
+    opaque = int(layer.translate(OPAQUE_TABLE), 2)
+    color = int(layer.translate(COLOR_TABLE), 2)
+    return opaque, color
+
+
+def merge_packed_layers(packed_layers, layer_len):
+    """
+    merge_layers() for packed layers. Each layer only contributes the color
+    of pixels it is the first to make opaque, so a whole layer merges with
+    result |= color & ~resolved, and we're done once every pixel is
+    resolved.
+    :param packed_layers: An iterable of (opaque, color) pairs from
+        pack_layer().
+    :param layer_len: The number of pixels in a layer.
+    :return: (resolved, result) bitplanes. A pixel is still transparent
+        where resolved is 0; elsewhere result gives its color.
+    """
+    all_resolved = (1 << layer_len) - 1
+    resolved = 0
+    result = 0
+    for opaque, color in packed_layers:
+        result |= color & ~resolved
+        resolved |= opaque
+        if resolved == all_resolved:
+            break
+    return resolved, result
+
+
+def unpack_layer(resolved, result, layer_len):
+    """
+    Turn merged bitplanes back into a list of pixels, as from
+    merge_layers().
+    :param resolved: The resolved bitplane from merge_packed_layers().
+    :param result: The result bitplane from merge_packed_layers().
+    :param layer_len: The number of pixels in a layer.
+    :return: A list of '0', '1' or '2' pixels.
+    """
+    resolved_bits = format(resolved, '0{}b'.format(layer_len))
+    result_bits = format(result, '0{}b'.format(layer_len))
+    return [bit if is_resolved == '1' else '2'
+            for is_resolved, bit in zip(resolved_bits, result_bits)]
+
+
+def merge_image(image):
+    """
+    merge_layers() for a NumPy array of layers. Each pixel takes its value
+    from the first layer in which it isn't transparent (2), found with
+    argmax over the layers axis. A pixel that is transparent in every layer
+    stays 2.
+    :param image: a uint8 array of layers, as from decode_image().
+    :return: a uint8 array of shape (rows, columns) of the merged values.
+    """
+    first_opaque = (image != 2).argmax(axis=0)
+    return np.take_along_axis(image, first_opaque[None], axis=0)[0]
+
+
+def count_layers(pixels, rows, columns):
+    """
+    Work out how many layers a memory-mapped image has.
+    :param pixels: The memory-mapped image file.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: The number of layers.
+    """
+    pixels_per_layer = columns * rows
+
+    # Ignore a trailing newline.
+    data_len = len(pixels)
+    while data_len and pixels[data_len - 1:data_len].isspace():
+        data_len -= 1
+
+    # Check that we have a valid data stream.
+    if data_len % pixels_per_layer != 0:
+        raise ValueError("The input data stream {} is the wrong length for a "
+                         "picture of {} rows by {} columns".format(
+                            data_len, rows, columns
+                            ))
+    return data_len // pixels_per_layer
+
+
+def image_tiles(rows, columns, tile_rows, tile_columns):
+    """
+    Split the picture into rectangular tiles.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :param tile_rows: The number of rows in a tile.
+    :param tile_columns: The number of columns in a tile.
+    :return: A list of (first row, end row, first column, end column)
+        tiles. The ends are exclusive.
+    """
+    return [(row, min(row + tile_rows, rows),
+             column, min(column + tile_columns, columns))
+            for row in range(0, rows, tile_rows)
+            for column in range(0, columns, tile_columns)]
+
+
+def tile_layers(pixels, rows, columns, tile):
+    """
+    Read one tile of each layer of a memory-mapped image, touching only
+    the bytes of the tile's rows.
+    :param pixels: The memory-mapped image file.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :param tile: A (first row, end row, first column, end column) tile.
+    :return: a generator of the tile's pixels in each layer, front to back.
+    """
+    first_row, end_row, first_column, end_column = tile
+    pixels_per_layer = columns * rows
+    for layer_num in range(count_layers(pixels, rows, columns)):
+        layer_start = layer_num * pixels_per_layer
+        yield b''.join(
+            pixels[layer_start + row * columns + first_column:
+                   layer_start + row * columns + end_column]
+            for row in range(first_row, end_row)).decode()
+
+
+def merge_tile(tile_task):
+    """
+    Merge the layers of one tile of an image. Runs in a worker process,
+    which maps the image file itself.
+    :param tile_task: (path, rows, columns, tile)
+    :return: (tile, merged pixels of the tile, as from merge_layers())
+    """
+    path, rows, columns, tile = tile_task
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pixels:
+        return tile, merge_layers(tile_layers(pixels, rows, columns, tile))
+
+
+def parallel_merge(path, rows, columns, tile_rows=64, tile_columns=64,
+                   processes=None):
+    """
+    Merge the layers of a large image by splitting it into tiles and
+    merging the tiles across a pool of processes. Each tile stops reading
+    layers as soon as all of its own pixels are set.
+    :param path: The path to the image file.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :param tile_rows: The number of rows in a tile.
+    :param tile_columns: The number of columns in a tile.
+    :param processes: The number of worker processes. Defaults to the
+        number of CPUs.
+    :return: A list of merged pixels, as from merge_layers().
+    """
+    result = ['2'] * (rows * columns)
+    tile_tasks = [(path, rows, columns, tile)
+                  for tile in image_tiles(rows, columns,
+                                          tile_rows, tile_columns)]
+    with multiprocessing.Pool(processes) as pool:
+        for tile, merged in pool.imap_unordered(merge_tile, tile_tasks):
+            if merged is None:
+                # The image has no layers.
                 continue
-            result[idx] = layer[idx]
+            first_row, end_row, first_column, end_column = tile
+            width = end_column - first_column
+            for row in range(first_row, end_row):
+                tile_start = (row - first_row) * width
+                result[row * columns + first_column:
+                       row * columns + end_column] = \
+                    merged[tile_start:tile_start + width]
     return result
 
 
+def stream_merge(path, rows, columns):
+    """
+    Merge the layers of an image file without reading it all in. The file
+    is memory-mapped and each layer is looked at in turn, so only the pages
+    of the current layer need to be in memory. All we keep is the merged
+    result so far and a mask of the pixels that are still transparent.
+    :param path: The path to the image file.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: a uint8 array of shape (rows, columns) of the merged values.
+    """
+    pixels_per_layer = columns * rows
+    result = np.full(pixels_per_layer, 2, dtype=np.uint8)
+    transparent = np.ones(pixels_per_layer, dtype=bool)
+
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pixels:
+        for layer_num in range(count_layers(pixels, rows, columns)):
+            layer = np.frombuffer(pixels, dtype=np.uint8,
+                                  count=pixels_per_layer,
+                                  offset=layer_num * pixels_per_layer) - \
+                ord('0')
+            # Pixels showing through to this layer take its value, unless
+            # it is transparent there too.
+            newly_set = transparent & (layer != 2)
+            result[newly_set] = layer[newly_set]
+            transparent &= ~newly_set
+            if not transparent.any():
+                # Deeper layers can't change anything.
+                break
+    return result.reshape(rows, columns)
+
+
+def decode_image(pixels, rows, columns):
+    """
+    Parse a stream of pixels straight into a NumPy array of layers, rather
+    than a list of layer strings.
+    :param pixels: The data stream of pixel values, as a str or bytes.
+    :param rows: The number of rows of pixels.
+    :param columns: The number of columns in the picture.
+    :return: a uint8 array of shape (layers, rows, columns).
+    """
+    if isinstance(pixels, str):
+        pixels = pixels.encode()
+    data = np.frombuffer(pixels.strip(), dtype=np.uint8) - ord('0')
+
+    # Check that we have a valid data stream.
+    pixels_per_layer = columns * rows
+    if len(data) % pixels_per_layer != 0:
+        raise ValueError("The input data stream {} is the wrong length for a "
+                         "picture of {} rows by {} columns".format(
+                            len(data), rows, columns
+                            ))
+    return data.reshape(-1, rows, columns)
+
+
 def layerize(pixels, rows, columns):
     """
     Take a stream of pixels and break it into a set of layers of pixels
@@ -139,12 +523,27 @@ def count_characters(candidate, characters):
 
 
 def main():
-    with open('8 input.txt') as f:
-        pixels = f.readline()
-    layers = layerize(pixels, 6, 25)
-    merged = merge_layers(layers)
-    for row in make_int0_pic(merged, 6, 25):
-        print(row)
+    if np is not None:
+        merged_image = stream_merge('8 input.txt', 6, 25)
+        # Back to a string of digits for make_into_pic().
+        merged = (merged_image.ravel() + ord('0')).tobytes().decode()
+    else:
+        with open('8 input.txt') as f:
+            merged = merge_layers(read_layers(f, 6, 25))
+
+    # Optionally render somewhere other than as text rows: '--blocks' for
+    # block characters, or a .png or .pgm file name.
+    output = sys.argv[1] if len(sys.argv) > 1 else None
+    if output == '--blocks':
+        for line in render_blocks(merged, 6, 25):
+            print(line)
+    elif output is not None and output.lower().endswith('.png'):
+        write_png(output, merged, 6, 25)
+    elif output is not None and output.lower().endswith('.pgm'):
+        write_pgm(output, merged, 6, 25)
+    else:
+        for row in make_into_pic(merged, 6, 25):
+            print(row)
 
 
 if __name__ == '__main__':
@@ -9,10 +9,12 @@ OP_JUMP_IF_TRUE = 5
 OP_JUMP_IF_FALSE = 6
 OP_LESS_THAN = 7
 OP_EQUALS = 8
+OP_ADJUST_RELATIVE_BASE = 9
 OP_HALT = 99
 
 PARAM_MODE_POSITIONAL = 0
 PARAM_MODE_IMMEDIATE = 1
+PARAM_MODE_RELATIVE = 2
 
 RETURN_LOCATION_PC = -1
 
@@ -90,5 +92,13 @@ OP_DEFS = {
         'op_function': op.equals,
         'instruction_width': 4,
     },
+    OP_ADJUST_RELATIVE_BASE: {
+        'p_locs': [1],
+        # Like OP_OUTPUT, there is no result stored in memory. The returned
+        # value is added to the relative base register instead.
+        'result_loc': 1,
+        'op_function': op.adjust_relative_base,
+        'instruction_width': 2,
+    },
 }
 
@@ -2,6 +2,20 @@ class HaltException (Exception):
     pass
 
 
+class LoopException (Exception):
+    """
+    Raised when a program is found to have entered a state it has been in
+    before. With no input to change its course, it would repeat forever.
+    """
+    def __init__(self, pc, first_step, period):
+        super().__init__(
+            "Program loops forever: the state at step {} (pc {}) repeats "
+            "every {} steps".format(first_step, pc, period))
+        self.pc = pc
+        self.first_step = first_step
+        self.period = period
+
+
 # Implement the instruction operations
 def add(params):
     return params[0] + params[1]
@@ -58,6 +72,12 @@ def equals(params):
         return 0
 
 
+def adjust_relative_base(params):
+    # No computation needed.  The executor adds the returned offset to its
+    # relative base register.
+    return params[0]
+
+
 def halt(params):
     # We're done.  Blow through the instruction decoder and catch this
     # in the main execute() loop.